@@ -1,5 +1,11 @@
 import os
+import hmac
+import shutil
+import tempfile
+from itertools import chain
+from pathlib import Path
 
+from contextlib import asynccontextmanager
 from typing import Annotated, Optional, List
 
 from fastapi import (
@@ -9,8 +15,11 @@ from fastapi import (
     File,
     UploadFile,
     Form,
+    Header,
     HTTPException,
 )
+from fastapi.responses import Response, PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from dotenv import load_dotenv
 from pydantic import BaseModel
 
@@ -21,8 +30,19 @@ from core.enums import (
     POS_CLASS_LABEL_ARG_NAME,
     NEG_CLASS_LABEL_ARG_NAME,
     CLASS_LABELS_ARG_NAME,
+    ALLOW_DENSE_CONVERSION_ARG_NAME,
+    DEFAULT_CHUNK_SIZE,
+    SupportedDataFormats,
+    SupportedOutputFormats,
 )
-from core.python_predictor import PredictResponse, PythonPredictor
+from core.data_readers import detect_data_format, DataReaderError
+from core.data_writers import iter_output_bytes
+from core.simpleml import ModelAdapterError
+from core.artifact_predictors.registry import predictor_registry
+from core.python_predictor import PredictResponse
+from core.python_trainer import TrainingJob, TrainingJobs, resolve_training_data
+from core.model_manager import ModelManager, DEFAULT_WATCH_INTERVAL
+from core.profiling import RequestProfiler, ProfileCapture, DEFAULT_MAX_CAPTURES
 
 
 load_dotenv()
@@ -31,7 +51,29 @@ if "CODE_DIR" not in os.environ:
   raise RuntimeError("CODE_DIR not defined in environment variables.")
 
 
-app = FastAPI()
+model_manager = ModelManager(
+    code_dir=os.environ["CODE_DIR"],
+    watch_interval=float(os.environ.get("MODEL_WATCH_INTERVAL", DEFAULT_WATCH_INTERVAL)),
+    warmup_data=os.environ.get("WARMUP_DATA"),
+)
+
+request_profiler = RequestProfiler(
+    sample_rate=float(os.environ.get("PROFILE_SAMPLE_RATE", 0.0)),
+    max_captures=int(os.environ.get("PROFILE_MAX_CAPTURES", DEFAULT_MAX_CAPTURES)),
+)
+
+training_jobs = TrainingJobs()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    model_manager.start_watching()
+    yield
+    model_manager.stop_watching()
+    training_jobs.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 class Input(BaseModel):
@@ -56,33 +98,123 @@ async def common_predict_params(
     positive_class_label: Annotated[Optional[str], Form()] = None,
     negative_class_label: Annotated[Optional[str], Form()] = None,
     class_labels: Annotated[List[str] | None, Form()] = None,
-    output_destination: Annotated[Optional[str], Form()] = None
+    allow_dense_conversion: Annotated[bool, Form()] = False,
+    output_destination: Annotated[Optional[str], Form()] = None,
+    x_simpleml_profile: Annotated[Optional[str], Header()] = None,
 ):
     return {
         TARGET_TYPE_ARG_NAME: target_type,
         POS_CLASS_LABEL_ARG_NAME: positive_class_label,
         NEG_CLASS_LABEL_ARG_NAME: negative_class_label,
         CLASS_LABELS_ARG_NAME: class_labels,
+        ALLOW_DENSE_CONVERSION_ARG_NAME: allow_dense_conversion,
         "input": input,
         "input_file": input_file,
         "output_destination": output_destination,
+        "profile": is_admin_token(x_simpleml_profile),
     }
 
 
 commons_predict_dep = Annotated[dict, Depends(common_predict_params)]
 
 
-def init_predictor(params):
+def is_admin_token(token: Optional[str]) -> bool:
+    admin_token = os.environ.get("ADMIN_TOKEN")
+    if not admin_token or token is None:
+        return False
+
+    # compared as bytes, as `compare_digest` only accepts ASCII strings.
+    return hmac.compare_digest(token.encode("utf-8"), admin_token.encode("utf-8"))
+
+
+async def verify_admin_token(x_simpleml_admin_token: Annotated[Optional[str], Header()] = None):
+    if not is_admin_token(x_simpleml_admin_token):
+        raise HTTPException(status_code=403, detail="A valid admin token is required.")
+
+
+async def common_fit_params(
+    target_type: Annotated[TargetType, Form()],
+    training_data: Annotated[str, Form()],
+    target: Annotated[str, Form()],
+    chunk_size: Annotated[int, Form()] = DEFAULT_CHUNK_SIZE,
+    checkpoint_every: Annotated[int, Form()] = 1,
+    positive_class_label: Annotated[Optional[str], Form()] = None,
+    negative_class_label: Annotated[Optional[str], Form()] = None,
+    class_labels: Annotated[List[str] | None, Form()] = None,
+):
+    return {
+        TARGET_TYPE_ARG_NAME: target_type,
+        POS_CLASS_LABEL_ARG_NAME: positive_class_label,
+        NEG_CLASS_LABEL_ARG_NAME: negative_class_label,
+        CLASS_LABELS_ARG_NAME: class_labels,
+        "training_data": training_data,
+        "target": target,
+        "chunk_size": chunk_size,
+        "checkpoint_every": checkpoint_every,
+    }
+
+
+commons_fit_dep = Annotated[dict, Depends(common_fit_params)]
+
+
+async def common_transform_params(
+    input_file: Annotated[UploadFile, File()],
+    chunk_size: Annotated[int, Form()] = DEFAULT_CHUNK_SIZE,
+    output_format: Annotated[str, Form()] = SupportedOutputFormats.CSV,
+):
+    return {
+        TARGET_TYPE_ARG_NAME: TargetType.TRANSFORM,
+        "input_file": input_file,
+        "chunk_size": chunk_size,
+        "output_format": output_format,
+    }
+
+
+commons_transform_dep = Annotated[dict, Depends(common_transform_params)]
+
+
+def get_code_dir():
     code_dir = os.environ['CODE_DIR']
 
     if not check_folder_exists(code_dir):
         raise HTTPException(status_code=404, detail=f"The following code_dir {code_dir} cannot be found")
 
-    predictor = PythonPredictor()
-    params["code_dir"] = code_dir
-    predictor.configure(params)
+    return code_dir
+
+
+def init_predictor(params):
+    get_code_dir()
 
-    return predictor
+    return model_manager.get_predictor(params)
+
+
+def get_request_predict_params(params) -> dict:
+    return {
+        arg_name: params.get(arg_name)
+        for arg_name in [
+            POS_CLASS_LABEL_ARG_NAME,
+            NEG_CLASS_LABEL_ARG_NAME,
+            CLASS_LABELS_ARG_NAME,
+            ALLOW_DENSE_CONVERSION_ARG_NAME,
+        ]
+    }
+
+
+def init_training_job(params):
+    params["code_dir"] = get_code_dir()
+
+    try:
+        resolve_training_data(params["code_dir"], params.get("training_data"))
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+
+    return training_jobs.submit(
+        params,
+        training_data=params.get("training_data"),
+        target=params.get("target"),
+        chunk_size=params.get("chunk_size"),
+        checkpoint_every=params.get("checkpoint_every"),
+    )
 
 
 @app.get("/")
@@ -94,37 +226,139 @@ def main():
 def predict(commons: commons_predict_dep):
     predictor = init_predictor(commons)
 
-    return predictor.predict(
-        target_type=commons.get("target_type"),
-        binary_data=commons.get("input"),
-        mimetype="application/json",
-    )
+    with request_profiler.profile("/predict", force=commons.get("profile")):
+        return predictor.predict(
+            target_type=commons.get("target_type"),
+            binary_data=commons.get("input"),
+            mimetype="application/json",
+            **get_request_predict_params(commons),
+        )
 
 
 @app.post("/predict-file", response_model=PredictResponse)
 async def predict_file(commons: commons_predict_dep):
     predictor = init_predictor(commons)
+    binary_data = await commons.get("input_file").read()
 
-    return predictor.predict(
-        target_type=commons.get("target_type"),
-        binary_data=await commons.get("input_file").read(),
-        mimetype=commons.get("input_file").content_type,
-    )
+    with request_profiler.profile("/predict-file", force=commons.get("profile")):
+        return predictor.predict(
+            target_type=commons.get("target_type"),
+            binary_data=binary_data,
+            mimetype=commons.get("input_file").content_type,
+            filename=commons.get("input_file").filename,
+            **get_request_predict_params(commons),
+        )
 
 
 @app.post("/batch-predict")
 async def batch_predict(commons: commons_predict_dep):
     # TODO: save predictions to file
     predictor = init_predictor(commons)
+    binary_data = await commons.get("input_file").read()
 
-    return predictor.predict(
-        target_type=commons.get("target_type"),
-        binary_data=await commons.get("input_file").read(),
-        mimetype=commons.get("input_file").content_type,
-        output_destination=commons.get("output_destination"),
-    )
+    with request_profiler.profile("/batch-predict", force=commons.get("profile")):
+        return predictor.predict(
+            target_type=commons.get("target_type"),
+            binary_data=binary_data,
+            mimetype=commons.get("input_file").content_type,
+            filename=commons.get("input_file").filename,
+            output_destination=commons.get("output_destination"),
+            **get_request_predict_params(commons),
+        )
+
+
+@app.post("/fit", response_model=TrainingJob, status_code=202, dependencies=[Depends(verify_admin_token)])
+def fit(commons: commons_fit_dep):
+    return init_training_job(commons)
+
+
+@app.get("/fit/{job_id}", response_model=TrainingJob, dependencies=[Depends(verify_admin_token)])
+def fit_status(job_id: str):
+    job = training_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Training job {job_id} cannot be found")
+
+    return job
 
 
 @app.post("/transform")
-def transform():
-    pass
+def transform(commons: commons_transform_dep):
+    output_format = commons.get("output_format")
+    if output_format not in SupportedOutputFormats.MIMETYPES:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Unsupported output format '{output_format}'. Only the following formats are supported {list(SupportedOutputFormats.MIMETYPES)}",
+        )
+
+    input_file = commons.get("input_file")
+    try:
+        data_format = detect_data_format(input_file.filename or "")
+    except DataReaderError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+
+    if data_format in SupportedDataFormats.SPARSE:
+        raise HTTPException(
+            status_code=422,
+            detail=f"{data_format} files cannot be transformed in chunks, only csv and parquet files are supported.",
+        )
+
+    # the uploaded file is closed once the endpoint returns, so it is copied to a file
+    # that lives until the response has been streamed.
+    with tempfile.NamedTemporaryFile(delete=False) as tmp_file:
+        shutil.copyfileobj(input_file.file, tmp_file)
+
+    try:
+        predictor = init_predictor(commons)
+        frames = predictor.transform(tmp_file.name, data_format=data_format, chunk_size=commons.get("chunk_size"))
+        # transform the first chunk before responding, so that errors are not hidden in a streamed response.
+        first_frame = next(frames, None)
+        frames = chain([first_frame], frames) if first_frame is not None else iter([])
+    except DataReaderError as exc:
+        os.remove(tmp_file.name)
+        raise HTTPException(status_code=422, detail=str(exc))
+    except ModelAdapterError as exc:
+        os.remove(tmp_file.name)
+        raise HTTPException(status_code=500, detail=str(exc))
+    except Exception:
+        os.remove(tmp_file.name)
+        raise
+
+    output_filename = Path(input_file.filename).stem + "_transformed" + SupportedOutputFormats.EXTENSIONS[output_format]
+    return StreamingResponse(
+        iter_output_bytes(frames, output_format),
+        media_type=SupportedOutputFormats.MIMETYPES[output_format],
+        headers={"Content-Disposition": f'attachment; filename="{output_filename}"'},
+        background=BackgroundTask(os.remove, tmp_file.name),
+    )
+
+
+@app.get("/admin/profiles", response_model=List[ProfileCapture], dependencies=[Depends(verify_admin_token)])
+def list_profiles():
+    return request_profiler.list_captures()
+
+
+@app.get("/admin/profiles/{capture_id}/pstats", dependencies=[Depends(verify_admin_token)])
+def download_profile(capture_id: str):
+    pstats_data = request_profiler.get_pstats(capture_id)
+    if pstats_data is None:
+        raise HTTPException(status_code=404, detail=f"Profile {capture_id} cannot be found")
+
+    return Response(
+        content=pstats_data,
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="{capture_id}.prof"'},
+    )
+
+
+@app.get("/admin/profiles/{capture_id}/allocations", response_class=PlainTextResponse, dependencies=[Depends(verify_admin_token)])
+def profile_allocations(capture_id: str):
+    allocations_report = request_profiler.get_allocations_report(capture_id)
+    if allocations_report is None:
+        raise HTTPException(status_code=404, detail=f"Profile {capture_id} cannot be found")
+
+    return allocations_report
+
+
+@app.get("/admin/import-times", dependencies=[Depends(verify_admin_token)])
+def import_times():
+    return predictor_registry.import_times()
@@ -73,6 +73,21 @@ class AbstractPredictor(ABC):
         pass
 
 
+    def can_fit_incrementally(self, model) -> bool:
+        """Given a model object, can this predictor update it one chunk of data at a time"""
+        return False
+
+
+    def partial_fit(self, X, y, model, **kwargs) -> Any:
+        """Update the model with a single chunk of training data and return it"""
+        raise NotImplementedError(f"{self.__class__.__name__} does not support incremental training")
+
+
+    def save_model_to_artifact(self, model, artifact_path) -> None:
+        """Serialize the model to the given artifact path"""
+        raise NotImplementedError(f"{self.__class__.__name__} does not support saving model artifacts")
+
+
     @abstractmethod
     def predict(self, data, model, **kwargs):
         """
@@ -92,7 +107,7 @@ class AbstractPredictor(ABC):
                 kwargs.get(NEG_CLASS_LABEL_ARG_NAME),
                 kwargs.get(POS_CLASS_LABEL_ARG_NAME),
             ]
-            if self.class_labels:
+            if None in self.class_labels:
                 raise ValueError(
                     f"For `{self.target_type.value}` target type the positive and negative class labels must be provied. Found: {self.class_labels}"
                 )
@@ -0,0 +1,127 @@
+import time
+import logging
+import importlib
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Any, Dict, List
+
+from core.enums import LOGGER_NAME_PREFIX, SupportedFrameworks, SupportedArtifacts
+
+
+class PredictorPlugin:
+    """
+    Describe a predictor without importing it.
+
+    Params
+    ______
+    name: name of the framework.
+    module: module defining the predictor, imported the first time the predictor is needed.
+    class_name: name of the predictor class inside `module`.
+    extensions: model artifact extensions the predictor can load.
+    model_modules: top level packages of the model classes the predictor can use, i.e `sklearn`.
+    framework_modules: framework modules imported, and timed, before the predictor module.
+    """
+    def __init__(
+        self,
+        name: str,
+        module: str,
+        class_name: str,
+        extensions: List[str],
+        model_modules: List[str],
+        framework_modules: List[str],
+    ):
+        self.name = name
+        self.module = module
+        self.class_name = class_name
+        self.extensions = [extension.lower() for extension in extensions]
+        self.model_modules = model_modules
+        self.framework_modules = framework_modules
+
+
+PREDICTOR_PLUGINS = [
+    PredictorPlugin(
+        name=SupportedFrameworks.SKLEARN,
+        module="core.artifact_predictors.sklearn_predictor",
+        class_name="SKLearnPredictor",
+        extensions=[SupportedArtifacts.PKL_EXTENSION],
+        model_modules=["sklearn"],
+        framework_modules=["pandas", "sklearn", "sklearn.base"],
+    ),
+]
+
+
+class PredictorRegistry:
+    """
+    Map artifact extensions and model types to predictors, importing a framework's
+    predictor only when an artifact or a model needs it.
+
+    The time spent importing each framework module, then the predictor module, is recorded
+    along with the time of the first model loaded by each framework, which imports the
+    framework submodules the model is made of. This keeps an eye on the startup cost as
+    frameworks are added.
+    """
+    def __init__(self, plugins: List[PredictorPlugin] = PREDICTOR_PLUGINS):
+        self._plugins = plugins
+        self._predictor_classes = {}
+        self._import_times = {}
+        self._lock = threading.Lock()
+        self._logger = logging.getLogger(LOGGER_NAME_PREFIX + "." + self.__class__.__name__)
+
+
+    @property
+    def supported_extensions(self) -> List[str]:
+        return [extension for plugin in self._plugins for extension in plugin.extensions]
+
+
+    def plugins_for_artifact(self, artifact_path) -> List[PredictorPlugin]:
+        suffix = Path(artifact_path).suffix.lower()
+        return [plugin for plugin in self._plugins if suffix in plugin.extensions]
+
+
+    def plugins_for_model(self, model: Any) -> List[PredictorPlugin]:
+        # look at the whole class hierarchy, so custom models extending i.e `sklearn.base.BaseEstimator` match too.
+        model_modules = {cls.__module__.split(".")[0] for cls in type(model).__mro__}
+        return [plugin for plugin in self._plugins if model_modules.intersection(plugin.model_modules)]
+
+
+    def load_predictor_class(self, plugin: PredictorPlugin) -> type:
+        predictor_class = self._predictor_classes.get(plugin.name)
+        if predictor_class is not None:
+            return predictor_class
+
+        with self._lock:
+            if plugin.name not in self._predictor_classes:
+                # modules are imported one after the other, so each time only covers
+                # what the previous ones did not already import.
+                for module_name in plugin.framework_modules + [plugin.module]:
+                    with self.timed(module_name):
+                        module = importlib.import_module(module_name)
+
+                self._predictor_classes[plugin.name] = getattr(module, plugin.class_name)
+
+        return self._predictor_classes[plugin.name]
+
+
+    @contextmanager
+    def timed(self, name: str):
+        """
+        Record how long the first run of the block named `name` takes.
+        """
+        if name in self._import_times:
+            yield
+            return
+
+        start = time.perf_counter()
+        yield
+        duration = time.perf_counter() - start
+
+        self._import_times.setdefault(name, duration)
+        self._logger.debug(f"{name} took {duration:.3f}s")
+
+
+    def import_times(self) -> Dict[str, float]:
+        return dict(self._import_times)
+
+
+predictor_registry = PredictorRegistry()
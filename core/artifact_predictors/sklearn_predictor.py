@@ -1,9 +1,25 @@
 from typing import Any
 
+import os
+import stat
 import pickle
+import tempfile
+from pathlib import Path
+
 import pandas as pd
 
-from core.enums import framework_deps, SupportedFrameworks, SupportedArtifacts
+from core.enums import (
+    framework_deps,
+    SupportedFrameworks,
+    SupportedArtifacts,
+    TargetType,
+    TARGET_TYPE_ARG_NAME,
+    CLASS_LABELS_ARG_NAME,
+    POS_CLASS_LABEL_ARG_NAME,
+    NEG_CLASS_LABEL_ARG_NAME,
+    ALLOW_DENSE_CONVERSION_ARG_NAME,
+)
+from core.utils import is_sparse
 from core.artifact_predictors.abstract_predictor import AbstractPredictor
 
 
@@ -52,6 +68,71 @@ class SKLearnPredictor(AbstractPredictor):
         return framework_deps[SupportedFrameworks.SKLEARN]
 
 
+    def can_fit_incrementally(self, model: Any) -> bool:
+        return self.can_use_model(model) and hasattr(model, "partial_fit")
+
+
+    def partial_fit(self, X: pd.DataFrame, y: pd.Series, model: Any, **kwargs) -> Any:
+        target_type = kwargs.get(TARGET_TYPE_ARG_NAME)
+
+        if target_type is not None and target_type.is_classification():
+            # sklearn requires the full list of classes on the first call of partial_fit,
+            # as a single chunk is not guaranteed to contain all of them.
+            if target_type == TargetType.BINARY:
+                classes = [kwargs.get(NEG_CLASS_LABEL_ARG_NAME), kwargs.get(POS_CLASS_LABEL_ARG_NAME)]
+            else:
+                classes = kwargs.get(CLASS_LABELS_ARG_NAME)
+
+            if not classes or None in classes:
+                raise ValueError(
+                    f"For `{target_type.value}` target type, class labels must be provided to train incrementally. Found: {classes}"
+                )
+            model.partial_fit(X, y, classes=self._cast_class_labels(classes, y))
+        else:
+            model.partial_fit(X, y)
+
+        return model
+
+
+    def _cast_class_labels(self, classes: list, y: pd.Series) -> list:
+        # class labels are received as strings, while the target column is often numeric.
+        try:
+            classes = pd.Series(classes)
+            if pd.api.types.is_numeric_dtype(y.dtype):
+                classes = pd.to_numeric(classes)
+            return classes.astype(y.dtype).tolist()
+        except (ValueError, TypeError) as exc:
+            raise ValueError(
+                f"Class labels {list(classes)} cannot be converted to the type of the target column ({y.dtype}). Exception: {exc!r}"
+            )
+
+
+    def save_model_to_artifact(self, model: Any, artifact_path: str) -> None:
+        # write to a unique temporary file next to the artifact first and swap it in,
+        # so readers of the artifact never see a partially written pickle.
+        fd, tmp_path = tempfile.mkstemp(dir=Path(artifact_path).parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as pickle_file:
+                pickle.dump(model, pickle_file)
+            # mkstemp creates the file readable by its owner only.
+            os.chmod(tmp_path, self._get_artifact_mode(artifact_path))
+            os.replace(tmp_path, artifact_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+    def _get_artifact_mode(self, artifact_path: str) -> int:
+        # keep the permissions of the artifact being replaced, or the ones `open` gives a new file.
+        if os.path.exists(artifact_path):
+            return stat.S_IMODE(os.stat(artifact_path).st_mode)
+
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
     def predict(self, data: pd.DataFrame, model: Any, **kwargs):
         # run predict from parent to make certain predicate are met.
         super(SKLearnPredictor, self).predict(data, model, **kwargs)
@@ -60,13 +141,30 @@ class SKLearnPredictor(AbstractPredictor):
         if self.target_type.is_classification():
             if hasattr(model, "classes_"):
                 labels_to_use = list(model.classes_)
-            preds = model.predict_proba(data)
+            preds = self._run_model(model.predict_proba, data, **kwargs)
             preds = pd.DataFrame(preds)
         elif self.target_type.is_regression_or_anomaly():
-            preds = model.predict(data)
+            preds = self._run_model(model.predict, data, **kwargs)
         else:
             raise ValueError(
                 f"Target type {self.target_type.value} is not supported by {self.__class__.__name__} predictor"
             )
 
         return preds, labels_to_use
+
+
+    def _run_model(self, method, data, **kwargs):
+        # sparse matrices are passed as is, sklearn raises a TypeError for estimators requiring dense data.
+        try:
+            return method(data)
+        except TypeError as exc:
+            if not is_sparse(data):
+                raise
+            if not kwargs.get(ALLOW_DENSE_CONVERSION_ARG_NAME):
+                raise ValueError(
+                    f"The model does not support sparse input. Set `{ALLOW_DENSE_CONVERSION_ARG_NAME}` to convert it to a dense array. "
+                    f"Exception: {exc!r}"
+                )
+
+        self._logger.warning(f"Converting sparse input of shape {data.shape} to a dense array for the model.")
+        return method(data.toarray())
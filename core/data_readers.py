@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import io
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO, Iterator, Optional, Union
+
+from core.enums import DEFAULT_CHUNK_SIZE, SupportedDataFormats
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class DataReaderError(Exception):
+    """
+    Raised when a data source cannot be read
+    """
+
+
+def detect_data_format(source: Union[str, Path]) -> str:
+    suffix = Path(source).suffix.lower()
+    data_format = SupportedDataFormats.EXTENSIONS.get(suffix)
+
+    if data_format is None:
+        raise DataReaderError(
+            f"Unsupported data file extension '{suffix}' for {source}.\n"
+            f"Only the following files extensions are supported {list(SupportedDataFormats.EXTENSIONS)}"
+        )
+
+    return data_format
+
+
+def iter_data_chunks(
+    source: Union[str, Path, BinaryIO],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    data_format: Optional[str] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Read a local file (or a binary file object) one chunk of rows at a time.
+
+    Only one chunk is held in memory at a time, so memory is bounded by
+    `chunk_size` rather than by the size of the dataset.
+    """
+    if chunk_size < 1:
+        raise DataReaderError(f"chunk_size must be a positive integer, but received {chunk_size}")
+
+    if data_format is None:
+        data_format = detect_data_format(source)
+
+    if data_format == SupportedDataFormats.CSV:
+        yield from _iter_csv_chunks(source, chunk_size)
+    elif data_format == SupportedDataFormats.PARQUET:
+        yield from _iter_parquet_chunks(source, chunk_size)
+    else:
+        raise DataReaderError(f"Data format '{data_format}' cannot be read in chunks.")
+
+
+def _iter_csv_chunks(source, chunk_size: int) -> Iterator[pd.DataFrame]:
+    import pandas as pd
+
+    try:
+        with pd.read_csv(source, chunksize=chunk_size) as reader:
+            for chunk in reader:
+                yield chunk
+    except UnicodeDecodeError:
+        raise DataReaderError("Supplied CSV input file encoding must be UTF-8.")
+    except (pd.errors.EmptyDataError, pd.errors.ParserError) as exc:
+        raise DataReaderError(f"Supplied CSV input file could not be parsed. Exception: {exc}")
+
+
+def _iter_parquet_chunks(source, chunk_size: int) -> Iterator[pd.DataFrame]:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ModuleNotFoundError:
+        raise DataReaderError("Reading parquet files requires `pyarrow`. Install it with `pip install pyarrow`.")
+
+    try:
+        parquet_file = pq.ParquetFile(source)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    except pa.ArrowException as exc:
+        raise DataReaderError(f"Supplied parquet input file could not be parsed. Exception: {exc}")
+
+
+def read_sparse_data(binary_data: bytes, data_format: str, n_features: Optional[int] = None):
+    """
+    Read `.npz` or svmlight/libsvm data into a `scipy.sparse.csr_matrix` without densifying it.
+
+    The svmlight format only stores non-zero features, so `n_features` can be given
+    to keep the number of columns expected by the model when trailing features are empty.
+    It is ignored for npz files, which store their shape.
+    """
+    if data_format == SupportedDataFormats.NPZ:
+        try:
+            import scipy.sparse
+        except ModuleNotFoundError:
+            raise DataReaderError("Reading npz files requires `scipy`. Install it with `pip install scipy`.")
+
+        return scipy.sparse.load_npz(io.BytesIO(binary_data)).tocsr()
+
+    if data_format == SupportedDataFormats.SVMLIGHT:
+        try:
+            from sklearn.datasets import load_svmlight_file
+        except ModuleNotFoundError:
+            raise DataReaderError("Reading svmlight files requires `scikit-learn`. Install it with `pip install scikit-learn`.")
+
+        # the index base is fixed rather than guessed per request ("auto"), which would shift every
+        # column by one for requests where no row uses feature 0. Matches `dump_svmlight_file`.
+        matrix, _ = load_svmlight_file(io.BytesIO(binary_data), n_features=n_features, zero_based=True)
+        return matrix
+
+    raise DataReaderError(f"Data format '{data_format}' is not a sparse data format.")
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import io
+import logging
+from typing import TYPE_CHECKING, Iterable, Iterator
+
+from core.utils import is_sparse
+from core.enums import LOGGER_NAME_PREFIX, SupportedOutputFormats
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+logger = logging.getLogger(LOGGER_NAME_PREFIX + ".data_writers")
+
+
+class DataWriterError(Exception):
+    """
+    Raised when data cannot be written to the requested output format
+    """
+
+
+def iter_output_bytes(frames: Iterable[pd.DataFrame], output_format: str) -> Iterator[bytes]:
+    """
+    Serialize dataframes one at a time, so the output can be streamed without holding all of it in memory.
+
+    A failure after the first bytes have been sent can only be signalled by ending the stream early.
+    A truncated CSV looks complete, while an arrow stream that is cut short has no end-of-stream
+    marker, so arrow should be preferred when the output must be checked for completeness.
+    """
+    if output_format == SupportedOutputFormats.CSV:
+        chunks = _iter_csv_bytes(frames)
+    elif output_format == SupportedOutputFormats.ARROW:
+        chunks = _iter_arrow_stream_bytes(frames)
+    else:
+        raise DataWriterError(
+            f"Unsupported output format '{output_format}'. Only the following formats are supported {list(SupportedOutputFormats.MIMETYPES)}"
+        )
+
+    try:
+        yield from chunks
+    except Exception as exc:
+        logger.exception(f"Streaming the {output_format} output failed, the output is incomplete. Exception: {exc!r}")
+        raise
+
+
+def _iter_csv_bytes(frames: Iterable[pd.DataFrame]) -> Iterator[bytes]:
+    header = True
+    for frame in frames:
+        _validate_frame(frame)
+        yield frame.to_csv(index=False, header=header).encode("utf-8")
+        header = False
+
+
+def _iter_arrow_stream_bytes(frames: Iterable[pd.DataFrame]) -> Iterator[bytes]:
+    try:
+        import pyarrow as pa
+    except ModuleNotFoundError:
+        raise DataWriterError("Writing arrow streams requires `pyarrow`. Install it with `pip install pyarrow`.")
+
+    sink = io.BytesIO()
+    writer = None
+    schema = None
+
+    for frame in frames:
+        _validate_frame(frame)
+        # every chunk is cast to the schema of the first one, as an arrow stream has a single schema.
+        table = pa.Table.from_pandas(frame, schema=schema, preserve_index=False)
+        if writer is None:
+            schema = table.schema
+            writer = pa.ipc.new_stream(sink, schema)
+
+        writer.write_table(table)
+        yield _flush(sink)
+
+    if writer is not None:
+        writer.close()
+        yield _flush(sink)
+
+
+def _flush(sink: io.BytesIO) -> bytes:
+    data = sink.getvalue()
+    sink.seek(0)
+    sink.truncate(0)
+    return data
+
+
+def _validate_frame(frame) -> None:
+    import pandas as pd
+
+    if is_sparse(frame) or not isinstance(frame, pd.DataFrame):
+        raise DataWriterError(f"Only pandas dataframes can be streamed, but received {type(frame)}")
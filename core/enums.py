@@ -16,6 +16,15 @@ POS_CLASS_LABEL_ARG_NAME = "positive_class_label"
 
 NEG_CLASS_LABEL_ARG_NAME = "negative_class_label"
 
+ALLOW_DENSE_CONVERSION_ARG_NAME = "allow_dense_conversion"
+
+# set to True in custom.py when the hooks accept scipy.sparse matrices
+SUPPORTS_SPARSE_ATTR_NAME = "supports_sparse"
+
+DEFAULT_ARTIFACT_NAME = "model"
+
+DEFAULT_CHUNK_SIZE = 10000
+
 
 class CustomHooks:
     INIT = "init"
@@ -33,6 +42,8 @@ class CustomHooks:
         SCORE,
     ]
 
+    ALL = ALL_PREDICT + [FIT]
+
 
 class TargetType(str, Enum):
     BINARY = "binary"
@@ -49,6 +60,13 @@ class TargetType(str, Enum):
         return self in [self.REGRESSION, self.ANOMALY]
 
 
+class JobStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
 class SupportedFrameworks:
     SKLEARN = "scikit-learn"
 
@@ -57,6 +75,50 @@ class SupportedArtifacts:
     PKL_EXTENSION = ".pkl"
 
 
+class SupportedDataFormats:
+    CSV = "csv"
+    PARQUET = "parquet"
+    NPZ = "npz"
+    SVMLIGHT = "svmlight"
+
+    SPARSE = [
+        NPZ,
+        SVMLIGHT,
+    ]
+
+    EXTENSIONS = {
+        ".csv": CSV,
+        ".parquet": PARQUET,
+        ".pq": PARQUET,
+        ".npz": NPZ,
+        ".svmlight": SVMLIGHT,
+        ".libsvm": SVMLIGHT,
+        ".svm": SVMLIGHT,
+    }
+
+    MIMETYPES = {
+        "text/csv": CSV,
+        "application/vnd.apache.parquet": PARQUET,
+        "application/x-npz": NPZ,
+        "application/x-svmlight": SVMLIGHT,
+    }
+
+
+class SupportedOutputFormats:
+    CSV = "csv"
+    ARROW = "arrow"
+
+    MIMETYPES = {
+        CSV: "text/csv",
+        ARROW: "application/vnd.apache.arrow.stream",
+    }
+
+    EXTENSIONS = {
+        CSV: ".csv",
+        ARROW: ".arrows",
+    }
+
+
 framework_deps = {
     SupportedFrameworks.SKLEARN: ["scikit-learn", "scipy", "numpy"]
 }
@@ -0,0 +1,189 @@
+import logging
+import mimetypes
+import threading
+from typing import Optional
+
+from core.utils import get_fullpath
+from core.python_predictor import PythonPredictor
+from core.artifact_predictors.registry import predictor_registry
+from core.enums import (
+    LOGGER_NAME_PREFIX,
+    CUSTOM_FILE_NAME,
+    TargetType,
+    TARGET_TYPE_ARG_NAME,
+    POS_CLASS_LABEL_ARG_NAME,
+    NEG_CLASS_LABEL_ARG_NAME,
+    CLASS_LABELS_ARG_NAME,
+)
+
+
+DEFAULT_WATCH_INTERVAL = 2.0
+
+
+class ModelManager:
+    """
+    Keep loaded predictors warm between requests and hot-swap them when the model
+    artifact or custom.py changes in code_dir.
+
+    A single predictor is cached per target type, so the cache is bounded by the number of
+    target types. Class labels and dense conversion are given with each prediction instead.
+    On a change, every cached predictor is loaded again in the background and validated
+    with a sample prediction before all of them are switched at once. Requests already
+    holding the previous predictor finish with it, and a failed reload leaves the
+    previous predictors serving.
+    """
+    def __init__(
+        self,
+        code_dir: str,
+        watch_interval: float = DEFAULT_WATCH_INTERVAL,
+        warmup_data: Optional[str] = None,
+    ):
+        self.code_dir = code_dir
+        self.watch_interval = watch_interval
+        self.warmup_data = warmup_data
+        # replaced as a whole and never mutated, so readers don't need the lock.
+        self._predictors = {}
+        self._params = {}
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._watcher = None
+        self._logger = logging.getLogger(LOGGER_NAME_PREFIX + "." + self.__class__.__name__)
+        self._files_signature = self._get_files_signature()
+
+
+    def get_predictor(self, params) -> PythonPredictor:
+        key = self._get_predictor_key(params)
+        predictor = self._predictors.get(key)
+
+        if predictor is None:
+            with self._lock:
+                predictor = self._predictors.get(key)
+                if predictor is None:
+                    predictor_params = self._get_predictor_params(params)
+                    predictor = self._load_predictor(predictor_params)
+                    self._params = {**self._params, key: predictor_params}
+                    self._predictors = {**self._predictors, key: predictor}
+
+        return predictor
+
+
+    def reload(self) -> bool:
+        """
+        Load and validate new predictors for all cached target types, then swap them in.
+        Return False and keep the current predictors if any of them fails to load.
+
+        New predictors are loaded without holding the lock used by `get_predictor`,
+        so requests for a target type that is not cached yet are not blocked by a reload.
+        """
+        with self._reload_lock:
+            try:
+                predictors = {key: self._load_predictor(params) for key, params in self._params.items()}
+            except Exception as exc:
+                self._logger.exception(f"Failed to reload the model, the previous model keeps serving. Exception: {exc!r}")
+                return False
+
+            with self._lock:
+                self._predictors = {**self._predictors, **predictors}
+
+        self._logger.info(f"Model reloaded from {self.code_dir}")
+        return True
+
+
+    def start_watching(self):
+        if self.watch_interval <= 0 or self._watcher is not None:
+            return
+
+        if not self.warmup_data:
+            self._logger.error(
+                "WARMUP_DATA is not set, models are not hot-swapped as they cannot be validated with a sample prediction."
+            )
+            return
+
+        self._stop_event.clear()
+        self._watcher = threading.Thread(target=self._watch, name="simpleml-model-watcher", daemon=True)
+        self._watcher.start()
+
+
+    def stop_watching(self):
+        if self._watcher is None:
+            return
+
+        self._stop_event.set()
+        self._watcher.join()
+        self._watcher = None
+
+
+    def _watch(self):
+        while not self._stop_event.wait(self.watch_interval):
+            try:
+                files_signature = self._get_files_signature()
+            except OSError as exc:
+                self._logger.warning(f"Could not scan {self.code_dir} for changes. Exception: {exc!r}")
+                continue
+
+            if files_signature == self._files_signature:
+                continue
+
+            self._logger.info(f"Change detected in {self.code_dir}, reloading the model")
+            self._files_signature = files_signature
+            self.reload()
+
+
+    def _get_files_signature(self) -> frozenset:
+        watched_extensions = predictor_registry.supported_extensions
+        signature = set()
+
+        for file in get_fullpath(self.code_dir).rglob("*"):
+            if file.suffix.lower() in watched_extensions or file.name == f"{CUSTOM_FILE_NAME}.py":
+                stat = file.stat()
+                signature.add((str(file), stat.st_mtime_ns, stat.st_size))
+
+        return frozenset(signature)
+
+
+    def _load_predictor(self, params) -> PythonPredictor:
+        predictor = PythonPredictor()
+        predictor.configure(dict(params))
+
+        if self.warmup_data:
+            warmup_path = get_fullpath(self.code_dir).joinpath(self.warmup_data)
+            # a sample prediction validates the new model and warms it before it gets traffic.
+            if predictor.target_type == TargetType.TRANSFORM:
+                next(predictor.transform(warmup_path), None)
+            else:
+                mimetype, _ = mimetypes.guess_type(str(warmup_path))
+                predictor.predict(
+                    binary_data=warmup_path.read_bytes(),
+                    mimetype=mimetype,
+                    filename=warmup_path.name,
+                    **self._get_warmup_labels(predictor),
+                )
+
+        return predictor
+
+
+    def _get_warmup_labels(self, predictor: PythonPredictor) -> dict:
+        # class labels are given per request, so the sample prediction uses the ones known by the model.
+        classes = getattr(predictor.model, "classes_", None)
+        if classes is None:
+            return {}
+
+        classes = [str(label) for label in classes]
+        if predictor.target_type == TargetType.BINARY and len(classes) == 2:
+            return {NEG_CLASS_LABEL_ARG_NAME: classes[0], POS_CLASS_LABEL_ARG_NAME: classes[1]}
+        if predictor.target_type == TargetType.MULTICLASS:
+            return {CLASS_LABELS_ARG_NAME: classes}
+
+        return {}
+
+
+    def _get_predictor_params(self, params) -> dict:
+        return {
+            TARGET_TYPE_ARG_NAME: self._get_predictor_key(params),
+            "code_dir": self.code_dir,
+        }
+
+
+    def _get_predictor_key(self, params) -> TargetType:
+        return TargetType(params.get(TARGET_TYPE_ARG_NAME))
@@ -0,0 +1,168 @@
+import time
+import uuid
+import random
+import marshal
+import logging
+import cProfile
+import threading
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from core.enums import LOGGER_NAME_PREFIX
+
+
+DEFAULT_MAX_CAPTURES = 20
+
+DEFAULT_TOP_ALLOCATIONS = 25
+
+TRACEMALLOC_FRAMES = 10
+
+
+class ProfileCapture(BaseModel):
+    """
+    Summary of a profiled request.
+
+    Schema
+    ------
+    id: identifier of the capture, used to download it.
+    name: name of the profiled operation, i.e the endpoint.
+    created_at: unix timestamp at which the capture started.
+    duration: wall time of the profiled operation in seconds.
+    peak_memory: peak of memory traced by tracemalloc during the operation in bytes.
+    """
+    id: str
+    name: str
+    created_at: float
+    duration: float
+    peak_memory: int
+
+
+class _Capture:
+    def __init__(self, info: ProfileCapture, pstats_data: bytes, allocations_report: str):
+        self.info = info
+        self.pstats_data = pstats_data
+        self.allocations_report = allocations_report
+
+
+class RequestProfiler:
+    """
+    Run sampled requests under cProfile and tracemalloc and keep the last captures in memory.
+
+    tracemalloc traces the whole process, so a single request is profiled at a time.
+    Requests sampled while another capture is running are served without profiling.
+    """
+    def __init__(
+        self,
+        sample_rate: float = 0.0,
+        max_captures: int = DEFAULT_MAX_CAPTURES,
+        top_allocations: int = DEFAULT_TOP_ALLOCATIONS,
+    ):
+        self.sample_rate = sample_rate
+        self.top_allocations = top_allocations
+        self._captures = deque(maxlen=max_captures)
+        self._capture_lock = threading.Lock()
+        self._logger = logging.getLogger(LOGGER_NAME_PREFIX + "." + self.__class__.__name__)
+
+
+    def should_profile(self, force: bool = False) -> bool:
+        return force or (self.sample_rate > 0 and random.random() < self.sample_rate)
+
+
+    @contextmanager
+    def profile(self, name: str, force: bool = False):
+        if not self.should_profile(force) or not self._capture_lock.acquire(blocking=False):
+            yield
+            return
+
+        try:
+            started_tracing = not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+            tracemalloc.reset_peak()
+            snapshot_before = tracemalloc.take_snapshot()
+
+            profiler = cProfile.Profile()
+            created_at = time.time()
+            start = time.perf_counter()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                duration = time.perf_counter() - start
+                snapshot_after = tracemalloc.take_snapshot()
+                _, peak_memory = tracemalloc.get_traced_memory()
+                if started_tracing:
+                    tracemalloc.stop()
+
+                try:
+                    self._add_capture(name, created_at, duration, peak_memory, profiler, snapshot_before, snapshot_after)
+                except Exception as exc:
+                    self._logger.exception(f"Failed to save the profile of {name}. Exception: {exc!r}")
+        finally:
+            self._capture_lock.release()
+
+
+    def list_captures(self) -> List[ProfileCapture]:
+        return [capture.info for capture in reversed(self._captures)]
+
+
+    def get_pstats(self, capture_id: str) -> Optional[bytes]:
+        capture = self._get_capture(capture_id)
+        return capture.pstats_data if capture else None
+
+
+    def get_allocations_report(self, capture_id: str) -> Optional[str]:
+        capture = self._get_capture(capture_id)
+        return capture.allocations_report if capture else None
+
+
+    def _get_capture(self, capture_id: str) -> Optional[_Capture]:
+        for capture in self._captures:
+            if capture.info.id == capture_id:
+                return capture
+
+        return None
+
+
+    def _add_capture(self, name, created_at, duration, peak_memory, profiler, snapshot_before, snapshot_after):
+        info = ProfileCapture(
+            id=uuid.uuid4().hex,
+            name=name,
+            created_at=created_at,
+            duration=duration,
+            peak_memory=peak_memory,
+        )
+
+        # same format as `pstats.Stats.dump_stats`, so it can be loaded with `pstats.Stats(path)`.
+        profiler.create_stats()
+        pstats_data = marshal.dumps(profiler.stats)
+
+        allocations_report = self._format_allocations(info, snapshot_before, snapshot_after)
+        self._captures.append(_Capture(info, pstats_data, allocations_report))
+        self._logger.info(f"Profiled {name} in {duration:.3f}s, capture id: {info.id}")
+
+
+    def _format_allocations(self, info: ProfileCapture, snapshot_before, snapshot_after) -> str:
+        # hide the allocations made by the profiling itself.
+        filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ]
+        snapshot_before = snapshot_before.filter_traces(filters)
+        snapshot_after = snapshot_after.filter_traces(filters)
+        stats = snapshot_after.compare_to(snapshot_before, "lineno")
+
+        lines = [
+            f"Capture {info.id} - {info.name}",
+            f"Duration: {info.duration:.3f}s, peak traced memory: {info.peak_memory / 1024:.1f} KiB",
+            f"Top {self.top_allocations} allocations still alive at the end of the request:",
+        ]
+        for stat in stats[:self.top_allocations]:
+            lines.append(str(stat))
+
+        return "\n".join(lines) + "\n"
@@ -1,15 +1,19 @@
-from typing import Any, Optional, List
+from typing import Any, Optional, List, Iterator, Union, BinaryIO
+from pathlib import Path
 
 from numpydantic import NDArray, Shape
 from pydantic import BaseModel
 
 from core.simpleml import ModelAdapter
+from core.data_readers import iter_data_chunks
 from core.enums import (
     TargetType,
     TARGET_TYPE_ARG_NAME,
     POS_CLASS_LABEL_ARG_NAME,
     NEG_CLASS_LABEL_ARG_NAME,
     CLASS_LABELS_ARG_NAME,
+    ALLOW_DENSE_CONVERSION_ARG_NAME,
+    DEFAULT_CHUNK_SIZE,
 )
 
 
@@ -33,11 +37,13 @@ class PythonPredictor:
         positive_class_label: Optional[str] = None,
         negative_class_label: Optional[str] = None,
         class_labels: Optional[List[str]] = None,
+        allow_dense_conversion: bool = False,
     ):
         self.target_type = target_type
         self.positive_class_label = positive_class_label
         self.negative_class_label = negative_class_label
         self.class_labels = class_labels
+        self.allow_dense_conversion = allow_dense_conversion
         self._model_adapter = None
 
 
@@ -46,22 +52,57 @@ class PythonPredictor:
         self.negative_class_label = params.get(NEG_CLASS_LABEL_ARG_NAME)
         self.class_labels = params.get(CLASS_LABELS_ARG_NAME)
         self.target_type = TargetType(params.get(TARGET_TYPE_ARG_NAME))
+        self.allow_dense_conversion = bool(params.get(ALLOW_DENSE_CONVERSION_ARG_NAME))
         self.code_dir = params.get("code_dir")
 
-        self._model_adapter = ModelAdapter(code_dir=self.code_dir, target_type=self.target_type)
+        self._model_adapter = ModelAdapter(
+            code_dir=self.code_dir,
+            target_type=self.target_type,
+            allow_dense_conversion=self.allow_dense_conversion,
+        )
         self._model_adapter.load_custom_hooks()
 
         self._model = self._model_adapter.load_model_from_artifact()
 
 
+    @property
+    def model(self) -> Any:
+        return self._model
+
+
     def predict(self, **kwargs) -> PredictResponse:
+        """
+        Class labels and dense conversion can be given per call, in which case they
+        take precedence over the ones the predictor was configured with.
+        """
         kwargs[TARGET_TYPE_ARG_NAME] = self.target_type
-        if self.positive_class_label is not None and self.negative_class_label is not None:
-            kwargs[POS_CLASS_LABEL_ARG_NAME] = self.positive_class_label
-            kwargs[NEG_CLASS_LABEL_ARG_NAME] = self.negative_class_label
-        if self.class_labels:
-            kwargs[CLASS_LABELS_ARG_NAME] = self.class_labels
+        configured_params = {
+            POS_CLASS_LABEL_ARG_NAME: self.positive_class_label,
+            NEG_CLASS_LABEL_ARG_NAME: self.negative_class_label,
+            CLASS_LABELS_ARG_NAME: self.class_labels,
+            ALLOW_DENSE_CONVERSION_ARG_NAME: self.allow_dense_conversion,
+        }
+        for arg_name, value in configured_params.items():
+            if kwargs.get(arg_name) is None:
+                kwargs[arg_name] = value
 
         preds = self._model_adapter.predict(self._model, **kwargs)
 
         return PredictResponse(predictions=preds.values, columns=preds.columns.values)
+
+
+    def transform(
+        self,
+        source: Union[str, Path, BinaryIO],
+        data_format: Optional[str] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> Iterator:
+        """
+        Read `source` in chunks of `chunk_size` rows and yield each chunk once transformed,
+        so that only one chunk is held in memory at a time.
+        """
+        if self.target_type != TargetType.TRANSFORM:
+            raise ValueError(f"Target type must be `{TargetType.TRANSFORM.value}` to transform data, but received {self.target_type}")
+
+        chunks = iter_data_chunks(source, chunk_size=chunk_size, data_format=data_format)
+        yield from self._model_adapter.transform(chunks, self._model)
@@ -0,0 +1,239 @@
+import os
+import uuid
+import logging
+import argparse
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List
+
+from pydantic import BaseModel
+
+from core.simpleml import ModelAdapter
+from core.utils import get_fullpath
+from core.data_readers import iter_data_chunks
+from core.enums import (
+    LOGGER_NAME_PREFIX,
+    JobStatus,
+    TargetType,
+    DEFAULT_CHUNK_SIZE,
+    TARGET_TYPE_ARG_NAME,
+    POS_CLASS_LABEL_ARG_NAME,
+    NEG_CLASS_LABEL_ARG_NAME,
+    CLASS_LABELS_ARG_NAME,
+)
+
+
+DEFAULT_MAX_JOBS = 100
+
+
+def resolve_training_data(code_dir: str, training_data: str) -> Path:
+    """
+    Resolve `training_data` relative to code_dir and reject any path outside of it.
+    """
+    code_path = get_fullpath(code_dir).resolve()
+    data_path = code_path.joinpath(training_data).resolve()
+
+    if not data_path.is_relative_to(code_path):
+        raise ValueError(f"Training data must be inside code_dir {code_dir}, but received {training_data}")
+
+    return data_path
+
+
+class FitResponse(BaseModel):
+    """
+    Summary of an incremental training run.
+
+    Schema
+    ------
+    artifact: path of the saved model artifact.
+    rows: number of rows the model has been trained on.
+    chunks: number of chunks read from the training data.
+    checkpoints: number of times the model artifact has been saved.
+    """
+    artifact: str
+    rows: int
+    chunks: int
+    checkpoints: int
+
+
+class PythonTrainer:
+    def __init__(
+        self,
+        target_type: TargetType = None,
+        positive_class_label: Optional[str] = None,
+        negative_class_label: Optional[str] = None,
+        class_labels: Optional[List[str]] = None,
+    ):
+        self.target_type = target_type
+        self.positive_class_label = positive_class_label
+        self.negative_class_label = negative_class_label
+        self.class_labels = class_labels
+        self._model_adapter = None
+
+
+    def configure(self, params):
+        self.positive_class_label = params.get(POS_CLASS_LABEL_ARG_NAME)
+        self.negative_class_label = params.get(NEG_CLASS_LABEL_ARG_NAME)
+        self.class_labels = params.get(CLASS_LABELS_ARG_NAME)
+        self.target_type = TargetType(params.get(TARGET_TYPE_ARG_NAME))
+        self.code_dir = params.get("code_dir")
+
+        self._model_adapter = ModelAdapter(code_dir=self.code_dir, target_type=self.target_type)
+        self._model_adapter.load_custom_hooks()
+
+        self._model, self._artifact_path = self._model_adapter.load_model_for_fit()
+
+
+    def fit(
+        self,
+        training_data: str,
+        target: str,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        checkpoint_every: int = 1,
+        **kwargs
+    ) -> FitResponse:
+        """
+        Stream `training_data` in chunks of `chunk_size` rows and update the model with each chunk.
+        The model artifact is saved every `checkpoint_every` chunks and once more at the end,
+        so the serving path can pick up the latest model while training is still running.
+
+        `training_data` is resolved from the model's code_dir and must be inside of it.
+        """
+        if checkpoint_every < 1:
+            raise ValueError(f"checkpoint_every must be a positive integer, but received {checkpoint_every}")
+
+        kwargs[TARGET_TYPE_ARG_NAME] = self.target_type
+        if self.positive_class_label is not None and self.negative_class_label is not None:
+            kwargs[POS_CLASS_LABEL_ARG_NAME] = self.positive_class_label
+            kwargs[NEG_CLASS_LABEL_ARG_NAME] = self.negative_class_label
+        if self.class_labels:
+            kwargs[CLASS_LABELS_ARG_NAME] = self.class_labels
+
+        data_path = resolve_training_data(self.code_dir, training_data)
+
+        rows = chunks = checkpoints = 0
+        for chunk in iter_data_chunks(data_path, chunk_size=chunk_size):
+            self._model = self._model_adapter.fit(chunk, self._model, target, **kwargs)
+            rows += len(chunk)
+            chunks += 1
+
+            if chunks % checkpoint_every == 0:
+                self._artifact_path = self._model_adapter.save_model_to_artifact(self._model, self._artifact_path)
+                checkpoints += 1
+
+        if chunks == 0:
+            raise ValueError(f"No training data could be read from {data_path}")
+
+        if chunks % checkpoint_every != 0:
+            self._artifact_path = self._model_adapter.save_model_to_artifact(self._model, self._artifact_path)
+            checkpoints += 1
+
+        return FitResponse(artifact=self._artifact_path, rows=rows, chunks=chunks, checkpoints=checkpoints)
+
+
+class TrainingJob(BaseModel):
+    """
+    State of a training run started in the background.
+
+    Schema
+    ------
+    id: identifier of the job.
+    status: pending, running, succeeded or failed.
+    result: summary of the training run once it has succeeded.
+    error: reason of the failure once it has failed.
+    """
+    id: str
+    status: JobStatus
+    result: Optional[FitResponse] = None
+    error: Optional[str] = None
+
+
+class TrainingJobs:
+    """
+    Run training jobs in a background thread, one at a time, so that two runs never
+    checkpoint the same model artifact concurrently. The last `max_jobs` jobs are kept.
+    """
+    def __init__(self, max_jobs: int = DEFAULT_MAX_JOBS):
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="simpleml-trainer")
+        self._logger = logging.getLogger(LOGGER_NAME_PREFIX + "." + self.__class__.__name__)
+
+
+    def submit(self, params, **fit_kwargs) -> TrainingJob:
+        job = TrainingJob(id=uuid.uuid4().hex, status=JobStatus.PENDING)
+
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+
+        self._executor.submit(self._run, job, dict(params), fit_kwargs)
+        return job
+
+
+    def get(self, job_id: str) -> Optional[TrainingJob]:
+        return self._jobs.get(job_id)
+
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+    def _run(self, job: TrainingJob, params, fit_kwargs):
+        job.status = JobStatus.RUNNING
+        try:
+            trainer = PythonTrainer()
+            trainer.configure(params)
+            job.result = trainer.fit(**fit_kwargs)
+            job.status = JobStatus.SUCCEEDED
+        except Exception as exc:
+            self._logger.exception(f"Training job {job.id} failed. Exception: {exc!r}")
+            job.error = repr(exc)
+            job.status = JobStatus.FAILED
+
+
+def main():
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Train a model out-of-core from a local csv or parquet file.")
+    parser.add_argument("--code-dir", default=os.environ.get("CODE_DIR"), help="model folder, defaults to CODE_DIR")
+    parser.add_argument("--target-type", required=True, choices=[target_type.value for target_type in TargetType])
+    parser.add_argument("--training-data", required=True, help="training file, relative to the code dir")
+    parser.add_argument("--target", required=True, help="name of the target column")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--checkpoint-every", type=int, default=1)
+    parser.add_argument("--positive-class-label")
+    parser.add_argument("--negative-class-label")
+    parser.add_argument("--class-labels", nargs="+")
+    args = parser.parse_args()
+
+    if not args.code_dir:
+        parser.error("--code-dir is required when CODE_DIR is not defined in environment variables.")
+
+    logging.basicConfig(level=logging.INFO)
+
+    trainer = PythonTrainer()
+    trainer.configure({
+        TARGET_TYPE_ARG_NAME: args.target_type,
+        POS_CLASS_LABEL_ARG_NAME: args.positive_class_label,
+        NEG_CLASS_LABEL_ARG_NAME: args.negative_class_label,
+        CLASS_LABELS_ARG_NAME: args.class_labels,
+        "code_dir": args.code_dir,
+    })
+    response = trainer.fit(
+        training_data=args.training_data,
+        target=args.target,
+        chunk_size=args.chunk_size,
+        checkpoint_every=args.checkpoint_every,
+    )
+    print(response.model_dump_json(indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,29 @@
+from __future__ import annotations
+
 import io
 import sys
 import logging
+import importlib.util
 from pathlib import Path
-from typing import Any, NoReturn
-
-import pandas as pd
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, NoReturn
 
 from core.enums import (
     LOGGER_NAME_PREFIX,
     CUSTOM_FILE_NAME,
+    DEFAULT_ARTIFACT_NAME,
+    ALLOW_DENSE_CONVERSION_ARG_NAME,
+    SUPPORTS_SPARSE_ATTR_NAME,
+    SupportedDataFormats,
     CustomHooks,
     TargetType,
+    framework_deps,
 )
-from core.utils import get_fullpath
-from core.artifact_predictors.sklearn_predictor import SKLearnPredictor
+from core.utils import get_fullpath, is_sparse
+from core.data_readers import read_sparse_data
+from core.artifact_predictors.registry import predictor_registry
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 class ModelAdapterError(Exception):
@@ -26,43 +36,69 @@ class ModelAdapter():
     def __init__(
         self,
         code_dir: str,
-        target_type: str = None
+        target_type: str = None,
+        allow_dense_conversion: bool = False,
     ):
         self.code_dir = code_dir
         self._target_type = target_type
+        self._allow_dense_conversion = allow_dense_conversion
         self._predictor_to_use = None
-        self._hooks = {hook: None for hook in CustomHooks.ALL_PREDICT}
+        self._hooks = {hook: None for hook in CustomHooks.ALL}
+        self._hooks_support_sparse = False
 
-        self._artifact_predictors = [
-            SKLearnPredictor(),
-        ]
+        # predictors are instantiated on first use, see `_get_predictors`.
+        self._artifact_predictors = {}
 
         self._logger = logging.getLogger(LOGGER_NAME_PREFIX + "." + self.__class__.__name__)
 
 
     def predict(self, model: Any = None, **kwargs):
+        # without a transform hook the model sees the input columns as they are read.
+        n_features = None if self.has_custom_hook(CustomHooks.TRANSFORM) else getattr(model, "n_features_in_", None)
         data = self.load_data(
             binary_data=kwargs.get("binary_data"),
-            mimetype=kwargs.get("mimetype")
+            mimetype=kwargs.get("mimetype"),
+            filename=kwargs.get("filename"),
+            n_features=n_features,
         )
-        data = self.preprocess(data, model)
+        data = self.preprocess(data, model, allow_dense_conversion=kwargs.get(ALLOW_DENSE_CONVERSION_ARG_NAME))
         return self._predict(data, model, **kwargs)
 
 
-    def load_data(self, binary_data, mimetype):
+    def load_data(self, binary_data, mimetype, filename: str = None, n_features: int = None):
         if self.has_custom_hook(CustomHooks.READ_INPUT_DATA):
             try:
                 data = self._hooks[CustomHooks.READ_INPUT_DATA](binary_data)
             except Exception as exc:
                 self._log_and_raise_error(exc, "Failed to read input data using 'read_input_data' hook.")
         else:
-            data = self._read_structured_input_data_df(binary_data, mimetype)
+            data_format = self._detect_input_format(mimetype, filename)
+            if data_format in SupportedDataFormats.SPARSE:
+                data = self._read_sparse_input_data(binary_data, data_format, n_features)
+            else:
+                data = self._read_structured_input_data_df(binary_data, data_format)
 
         return data
 
 
-    def _read_structured_input_data_df(self, binary_data, mimetype) -> pd.DataFrame:
-        # FIXME: handle mimetype
+    def _detect_input_format(self, mimetype, filename) -> str:
+        if filename:
+            data_format = SupportedDataFormats.EXTENSIONS.get(Path(filename).suffix.lower())
+            if data_format is not None:
+                return data_format
+
+        return SupportedDataFormats.MIMETYPES.get(mimetype, SupportedDataFormats.CSV)
+
+
+    def _read_structured_input_data_df(self, binary_data, data_format: str = SupportedDataFormats.CSV) -> pd.DataFrame:
+        import pandas as pd
+
+        if data_format == SupportedDataFormats.PARQUET:
+            try:
+                return pd.read_parquet(io.BytesIO(binary_data))
+            except ImportError as exc:
+                self._log_and_raise_error(exc, "Reading parquet files requires `pyarrow`. Install it with `pip install pyarrow`.")
+
         try:
             df = pd.read_csv(io.BytesIO(binary_data))
         except UnicodeDecodeError:
@@ -72,8 +108,39 @@ class ModelAdapter():
         return df
 
 
-    def preprocess(self, data, model: Any = None) -> pd.DataFrame:
+    def _read_sparse_input_data(self, binary_data, data_format: str, n_features: int = None):
+        try:
+            return read_sparse_data(binary_data, data_format, n_features=n_features)
+        except Exception as exc:
+            self._log_and_raise_error(exc, f"Failed to read {data_format} sparse input data.")
+
+
+    def _to_dense_for_hook(self, data, hook, allow_dense_conversion: bool = None):
+        """
+        Hooks are considered dense-only unless custom.py sets `supports_sparse = True`.
+        Sparse data is only converted for them when dense conversion is explicitly allowed.
+        """
+        if not is_sparse(data) or self._hooks_support_sparse:
+            return data
+
+        if allow_dense_conversion is None:
+            allow_dense_conversion = self._allow_dense_conversion
+
+        if not allow_dense_conversion:
+            raise ModelAdapterError(
+                f"The '{hook}' hook does not support sparse input. Set `{SUPPORTS_SPARSE_ATTR_NAME} = True` in "
+                f"{CUSTOM_FILE_NAME}.py if it does, or set `{ALLOW_DENSE_CONVERSION_ARG_NAME}` to convert the input to a dense dataframe."
+            )
+
+        import pandas as pd
+
+        self._logger.warning(f"Converting sparse input of shape {data.shape} to a dense dataframe for the '{hook}' hook.")
+        return pd.DataFrame(data.toarray())
+
+
+    def preprocess(self, data, model: Any = None, allow_dense_conversion: bool = None) -> pd.DataFrame:
         if self.has_custom_hook(CustomHooks.TRANSFORM):
+            data = self._to_dense_for_hook(data, CustomHooks.TRANSFORM, allow_dense_conversion)
             try:
                 output = self._hooks[CustomHooks.TRANSFORM](data, model)
             except Exception as exc:
@@ -87,8 +154,13 @@ class ModelAdapter():
 
 
     def _validate_data(self, to_validate, hook) -> NoReturn:
+        import pandas as pd
+
         if hook in {CustomHooks.SCORE, CustomHooks.TRANSFORM}:
-            if not isinstance(to_validate, pd.DataFrame):
+            if is_sparse(to_validate):
+                if hook != CustomHooks.TRANSFORM:
+                    raise ValueError(f"{hook} must return a pandas dataframe, but received {type(to_validate)}")
+            elif not isinstance(to_validate, pd.DataFrame):
                 raise ValueError(f"{hook} must return a pandas dataframe, but received {type(to_validate)}")
 
         if len(to_validate.shape) != 2:
@@ -97,12 +169,15 @@ class ModelAdapter():
 
     def _predict(self, data, model, **kwargs):
         if self.has_custom_hook(CustomHooks.SCORE):
+            data = self._to_dense_for_hook(data, CustomHooks.SCORE, kwargs.get(ALLOW_DENSE_CONVERSION_ARG_NAME))
             try:
                 preds_df = self._hooks.get(CustomHooks.SCORE)(data, model, **kwargs)
             except Exception as exc:
                 self._log_and_raise_error(exc, "Model 'score' hook failed to make predictions.")
         else:
             try:
+                if kwargs.get(ALLOW_DENSE_CONVERSION_ARG_NAME) is None:
+                    kwargs[ALLOW_DENSE_CONVERSION_ARG_NAME] = self._allow_dense_conversion
                 preds_df, model_labels = self._predictor_to_use.predict(data, model, **kwargs)
             except Exception as exc:
                 self._log_and_raise_error(exc, "Failed to make predictions.")
@@ -110,6 +185,91 @@ class ModelAdapter():
         return preds_df
 
 
+    def transform(self, chunks: Iterable[pd.DataFrame], model: Any = None) -> Iterator[pd.DataFrame]:
+        """
+        Run the transform hook over the data one chunk at a time.
+        """
+        for chunk in chunks:
+            yield self.preprocess(chunk, model)
+
+
+    def fit(self, data: pd.DataFrame, model: Any, target_name: str, **kwargs) -> Any:
+        """
+        Train the model on a single chunk of data and return the updated model.
+        """
+        if target_name not in data.columns:
+            raise ModelAdapterError(f"Target column '{target_name}' could not be found in the training data.")
+
+        y = data[target_name]
+        X = self.preprocess(data.drop(target_name, axis=1), model)
+
+        if self.has_custom_hook(CustomHooks.FIT):
+            try:
+                model = self._hooks[CustomHooks.FIT](X, y, model, **kwargs)
+            except Exception as exc:
+                self._log_and_raise_error(exc, "Model 'fit' hook failed to train the model.")
+
+            if model is None:
+                raise ModelAdapterError(f"The '{CustomHooks.FIT}' hook must return the trained model.")
+        else:
+            predictor = self._find_predictor_to_fit(model)
+            try:
+                model = predictor.partial_fit(X, y, model, **kwargs)
+            except Exception as exc:
+                self._log_and_raise_error(exc, "Failed to train the model incrementally.")
+
+        return model
+
+
+    def _find_predictor_to_fit(self, model: Any):
+        for pred in self._get_predictors(predictor_registry.plugins_for_model(model)):
+            if pred.can_fit_incrementally(model):
+                return pred
+
+        raise ModelAdapterError(
+            f"The loaded model cannot be trained incrementally and no **{CustomHooks.FIT}** hook is provided in custom.py"
+        )
+
+
+    def load_model_for_fit(self):
+        """
+        Load the model to train and return it along with the artifact path its checkpoints are saved to.
+        When no artifact exists yet, the `fit` hook is expected to create the model from `None`.
+        """
+        try:
+            model_artifact_file = self._detect_model_artifact_file()
+        except ModelAdapterError:
+            if not self.has_custom_hook(CustomHooks.FIT):
+                raise
+            self._logger.info(f"No model artifact found in {self.code_dir}, the '{CustomHooks.FIT}' hook will create it.")
+            return None, None
+
+        self._model = self._load_model_via_predictors(model_artifact_file)
+        return self._model, model_artifact_file
+
+
+    def save_model_to_artifact(self, model: Any, artifact_path: str = None) -> str:
+        predictor = None
+        for pred in self._get_predictors(predictor_registry.plugins_for_model(model)):
+            if pred.can_use_model(model):
+                predictor = pred
+                break
+
+        if predictor is None:
+            raise ModelAdapterError(f"Could not find a framework to save the model of type {type(model)}")
+
+        if artifact_path is None:
+            artifact_path = str(get_fullpath(self.code_dir).joinpath(DEFAULT_ARTIFACT_NAME + predictor.artifact_extension))
+
+        try:
+            predictor.save_model_to_artifact(model, artifact_path)
+        except Exception as exc:
+            self._log_and_raise_error(exc, f"Could not save model to artifact file {artifact_path}.")
+
+        self._logger.debug(f"Model checkpoint saved to {artifact_path}")
+        return artifact_path
+
+
     def load_custom_hooks(self):
         code_dir = get_fullpath(self.code_dir)
         custom_files = list(Path(code_dir).rglob(f"{CUSTOM_FILE_NAME}.py"))
@@ -122,19 +282,37 @@ class ModelAdapter():
 
         custom_file_path = custom_files[0].parent
         self._logger.info(f"Detected {custom_file_path}... loading hooks")
-        sys.path.insert(0, str(custom_file_path))
+        if str(custom_file_path) not in sys.path:
+            sys.path.insert(0, str(custom_file_path))
 
         try:
-            custom_module = __import__(CUSTOM_FILE_NAME)
+            # load a fresh module on every call instead of going through the `sys.modules` cache,
+            # so that an updated custom.py is picked up when the model is reloaded.
+            spec = importlib.util.spec_from_file_location(CUSTOM_FILE_NAME, custom_files[0])
+            custom_module = importlib.util.module_from_spec(spec)
+            # the fresh module still replaces the cached one, as pickle looks classes defined in
+            # custom.py up in `sys.modules` and refuses the ones that are not the same object.
+            previous_module = sys.modules.get(CUSTOM_FILE_NAME)
+            sys.modules[CUSTOM_FILE_NAME] = custom_module
+            try:
+                spec.loader.exec_module(custom_module)
+            except BaseException:
+                if previous_module is None:
+                    sys.modules.pop(CUSTOM_FILE_NAME, None)
+                else:
+                    sys.modules[CUSTOM_FILE_NAME] = previous_module
+                raise
             self._load_custom_hooks(custom_module)
         except ImportError as e:
             self._log_and_raise_error(e, f"Failed to load hooks from [{custom_file_path}]")
 
 
     def _load_custom_hooks(self, custom_module):
-        for hook in CustomHooks.ALL_PREDICT:
+        for hook in CustomHooks.ALL:
             self._hooks[hook] = getattr(custom_module, hook, None)
 
+        self._hooks_support_sparse = getattr(custom_module, SUPPORTS_SPARSE_ATTR_NAME, False) is True
+
         # Run init hook if found
         if self.has_custom_hook(CustomHooks.INIT):
             self._hooks[CustomHooks.INIT](code_dir=self.code_dir)
@@ -143,8 +321,13 @@ class ModelAdapter():
 
 
     def load_model_from_artifact(self):
+        if (self._no_hook_to_run_transform()):
+            raise ModelAdapterError("A transform task requires a user-defined hook to run transformations.")
+
         if self.has_custom_hook(CustomHooks.INIT):
             self._model = self._load_model_via_hook()
+        elif self._target_type == TargetType.TRANSFORM:
+            self._model = self._load_optional_model()
         else:
             model_artifact_file = self._detect_model_artifact_file()
             self._model = self._load_model_via_predictors(model_artifact_file)
@@ -152,12 +335,20 @@ class ModelAdapter():
         if (self._no_hook_to_run_score()):
             self._find_predictor_to_use()
 
-        if (self._no_hook_to_run_transform()):
-            raise ModelAdapter("A transform task requires a user-defined hook to run transformations.")
-
         return self._model
 
 
+    def _load_optional_model(self):
+        # transform hooks don't always need a model, i.e for feature engineering steps.
+        try:
+            model_artifact_file = self._detect_model_artifact_file()
+        except ModelAdapterError:
+            self._logger.info(f"No model artifact found in {self.code_dir}, the '{CustomHooks.TRANSFORM}' hook will receive no model.")
+            return None
+
+        return self._load_model_via_predictors(model_artifact_file)
+
+
     def _no_hook_to_run_score(self):
         return self._target_type not in [TargetType.TRANSFORM, TargetType.UNSTRUCTURED] and not self.has_custom_hook(CustomHooks.SCORE)
 
@@ -171,7 +362,7 @@ class ModelAdapter():
 
 
     def _detect_model_artifact_file(self):
-        supported_extensions = [p.artifact_extension.lower() for p in self._artifact_predictors]
+        supported_extensions = predictor_registry.supported_extensions
         artifact_file = None
         files = get_fullpath(self.code_dir).rglob("*")
 
@@ -198,28 +389,27 @@ class ModelAdapter():
 
     def _load_model_via_predictors(self, model_artifact_file):
         model = None
-        predictors_for_artifact = []
-
-        for pred in self._artifact_predictors:
-            if pred.is_artifact_supported(model_artifact_file):
-                predictors_for_artifact.append(pred)
+        plugins_for_artifact = predictor_registry.plugins_for_artifact(model_artifact_file)
 
+        for pred in self._get_predictors(plugins_for_artifact):
             if pred.can_load_artifact(model_artifact_file):
                 try:
-                    model = pred.load_model_from_artifact(model_artifact_file)
+                    # the first load also imports the framework submodules the model is made of.
+                    with predictor_registry.timed(f"{pred.name} first model load"):
+                        model = pred.load_model_from_artifact(model_artifact_file)
                 except Exception as exc:
                     self._log_and_raise_error(exc, "Could not load model from artifact file.")
                 # stop the loop because model was loaded
                 break
 
         if model is None:
-            if len(predictors_for_artifact) > 0:
+            if len(plugins_for_artifact) > 0:
                 framework_err = f"""
                 The following frameworks support the loaded model artifact: {model_artifact_file}"
                 but no model could be loaded. Check if requirements are missing."
                 """
-                for pred in predictors_for_artifact:
-                    framework_err += f"Framework: {pred.name}, requirements: {pred.framework_requirements()}"
+                for plugin in plugins_for_artifact:
+                    framework_err += f"Framework: {plugin.name}, requirements: {framework_deps.get(plugin.name)}"
 
                 raise ModelAdapterError(framework_err)
             else:
@@ -234,17 +424,34 @@ class ModelAdapter():
     def _find_predictor_to_use(self) -> bool:
         self._predictor_to_use = None
 
-        for pred in self._artifact_predictors:
+        for pred in self._get_predictors(predictor_registry.plugins_for_model(self._model)):
             if pred.can_use_model(self._model):
                 self._predictor_to_use = pred
                 break
 
         if self._no_predictor_to_use_found():
-            raise ModelAdapter(f"Could not find a framework to handle the loaded model and no **{CustomHooks.SCORE}** hook is provided in custom.py")
+            raise ModelAdapterError(f"Could not find a framework to handle the loaded model and no **{CustomHooks.SCORE}** hook is provided in custom.py")
 
         self._logger.debug(f"Predictor to use: {self._predictor_to_use.name}")
 
 
+    def _get_predictors(self, plugins) -> list:
+        predictors = []
+
+        for plugin in plugins:
+            if plugin.name not in self._artifact_predictors:
+                try:
+                    predictor_class = predictor_registry.load_predictor_class(plugin)
+                except ImportError as exc:
+                    self._logger.warning(f"Could not import the {plugin.name} predictor. Exception: {exc!r}")
+                    continue
+                self._artifact_predictors[plugin.name] = predictor_class()
+
+            predictors.append(self._artifact_predictors[plugin.name])
+
+        return predictors
+
+
     def _no_predictor_to_use_found(self) -> bool:
         return not self._predictor_to_use and not self._hooks[CustomHooks.SCORE]
 
@@ -24,3 +24,8 @@ def get_fullpath(given_path: str):
 
 def get_project_fullpath():
     return Path(__file__).parent.parent
+
+
+def is_sparse(data) -> bool:
+    # checked on the type's module so that scipy is not imported for dense data.
+    return type(data).__module__.startswith("scipy.sparse")